@@ -1,4 +1,4 @@
-import csv
+import pandas as pd
 
 # ===== CONFIG =====
 INPUT_CSV = "E:\\Synthetic-Email-Generation-tool-main\\Candidate_application\\candidate_application1.csv"   # your generated file
@@ -6,22 +6,12 @@ OUTPUT_CSV = "E:\\Synthetic-Email-Generation-tool-main\\Candidate_application\\c
 LABEL_NAME = "candidate_application"
 
 # ===== PROCESS =====
-with open(INPUT_CSV, "r", encoding="utf-8") as infile, \
-     open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as outfile:
+# Only the body column is needed; keep empty bodies as "" rather than NaN
+df = pd.read_csv(INPUT_CSV, usecols=["body"], dtype=str, keep_default_na=False, encoding="utf-8")
 
-    reader = csv.DictReader(infile)
-    writer = csv.writer(outfile)
-
-    # Write new header
-    writer.writerow(["label", "text"])
-
-    for row in reader:
-        subject = row.get("subject", "").strip()
-        body = row.get("body", "").strip()
-
-        # Combine subject + body (ATS-style)
-        combined_text = f"Subject: {subject}\n\n{body}"
-
-        writer.writerow([LABEL_NAME, body])
+# Write new layout: label, text
+df["body"] = df["body"].str.strip()
+df.insert(0, "label", LABEL_NAME)
+df.rename(columns={"body": "text"}).to_csv(OUTPUT_CSV, index=False, encoding="utf-8")
 
 print("✅ Dataset successfully labeled and saved:", OUTPUT_CSV)
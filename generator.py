@@ -0,0 +1,466 @@
+import requests
+from requests.adapters import HTTPAdapter
+import orjson
+import os
+import time
+import re
+import csv
+import hashlib
+import random
+import itertools
+import sys
+from array import array
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# =========================
+# CONFIGURATION
+# =========================
+MODEL_NAME = "llama3.2:3b-instruct-q4_K_M" # Ensure you have this model
+OLLAMA_URL = "http://localhost:11434/api/generate"
+MAX_RETRIES = 3
+PARALLEL = 8             # In-flight requests; match OLLAMA_NUM_PARALLEL on the server
+REQUEST_TIMEOUT = 40 * PARALLEL  # Seconds per call; 40 s fit one stream, and PARALLEL replies share the server
+# Ollama stops generating at these, right after the INTENT block
+STOP_SEQUENCES = ["\nEND OF EXAMPLE", "\nNOTE:", "\n---"]
+FLUSH_EVERY = 25         # Flush the CSV buffer every N saved emails
+BUCKET_LIMIT = 5         # Max unique emails per (role, adjective) pair before it is skipped
+NUM_PREDICT_TIERS = [300, 400, 450]  # Reply token caps for short/medium/long roles
+NEAR_DUP_OVERLAP = 0.95  # Reject bodies whose own word 5-grams (prompt example excluded) are almost all seen
+NUM_THREAD = None        # CPU threads for Ollama; None lets the server use the physical core count
+BLOOM_BITS = 1 << 22     # Size of the near-duplicate Bloom filter (512 KB)
+BLOOM_HASHES = 5         # Bit positions set per 5-gram
+
+# =========================
+# DYNAMIC VARIABLES
+# =========================
+ROLES = [
+    "Software Engineer", "Data Scientist", "Marketing Manager", "Sales Representative",
+    "Graphic Designer", "Nurse", "Project Manager", "Accountant", "Teacher", "Chef",
+    "Electrician", "Customer Support Agent", "HR Specialist", "Product Owner",
+    "Social Media Manager", "Financial Analyst", "Executive Assistant", "Mechanic",
+    "UX/UI Designer", "Operations Manager", "Copywriter", "Receptionist",
+    "Civil Engineer", "DevOps Specialist", "Cybersecurity Analyst", "Legal Secretary",
+    "Warehouse Supervisor", "Phlebotomist", "Paralegal", "Event Planner",
+    "Supply Chain Analyst", "Real Estate Agent", "Dental Hygienist", "Architect",
+    "Video Editor", "Content Strategist", "IT Support Technician", "Plumber",
+    "Bank Teller", "Pharmacist", "Data Entry Clerk", "SEO Specialist",
+    "Flight Attendant", "QA Tester", "Cloud Architect", "Business Analyst",
+    "Network Engineer", "Systems Administrator", "Office Manager", "Editor",
+    "Interior Designer", "Landscape Architect", "Sustainability Consultant",
+    "Truck Driver", "Security Guard", "Bartender", "Web Developer",
+    "Physical Therapist", "Occupational Therapist", "Speech Pathologist",
+    "Radiologic Technologist", "Case Manager", "Recruiter", "PR Specialist",
+    "Digital Marketer", "E-commerce Manager", "Mobile App Developer",
+    "Game Designer", "Animator", "Sound Engineer", "Translator",
+    "Database Administrator", "Machine Learning Engineer", "Actuary",
+    "Investment Banker", "Mortgage Broker", "Loan Officer", "Insurance Agent",
+    "Underwriter", "Safety Inspector", "Construction Foreman", "Welder",
+    "CNC Machinist", "HVAC Technician", "Automotive Technician", "Pilot",
+    "Logistician", "Brand Ambassador", "Museum Curator", "Librarian",
+    "Non-profit Coordinator", "Grant Writer", "Policy Analyst",
+    "Sociologist", "Urban Planner", "Flight Instructor", "Personal Trainer"
+]
+
+ADJECTIVES = [
+    "passionate", "experienced", "entry-level", "motivated", "detail-oriented",
+    "innovative", "dedicated", "strategic", "creative", "results-driven",
+    "enthusiastic", "highly-organized", "resourceful", "proactive",
+    "technically-proficient", "adaptable", "hard-working", "analytical",
+    "collaborative", "forward-thinking", "self-motivated", "disciplined",
+    "client-focused", "versatile", "methodical", "ambitious", "reliable",
+    "dynamic", "energetic", "articulate", "knowledgeable", "empathetic",
+    "diligent", "professional", "resilient", "determined", "skilled",
+    "qualified", "fast-learning", "independent"
+]
+
+# =========================
+# SETUP
+# =========================
+# One keep-alive connection pool for every Ollama call in the process, sized for the worker threads
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=PARALLEL))
+session.headers["Content-Type"] = "application/json"
+
+# =========================
+# HELPER FUNCTIONS
+# =========================
+# Flash attention is a server setting: start Ollama with OLLAMA_FLASH_ATTENTION=1
+def call_ollama(prompt, system, num_predict=NUM_PREDICT_TIERS[-1], timeout=REQUEST_TIMEOUT):
+    """Returns (text, done_reason); done_reason is "length" when num_predict cut the reply short."""
+    payload = {
+        "model": MODEL_NAME,
+        "system": system,
+        "prompt": prompt,
+        "stream": False,
+        "options": {
+    "temperature": 0.8,
+    "top_p": 0.9,
+    # Prompt is ~500 tokens and replies ~300; a small context keeps the KV cache lean
+    "num_ctx": 1024,
+    "num_predict": num_predict,
+    "repeat_penalty": 1.1,
+    "stop": STOP_SEQUENCES,
+}
+    }
+    if NUM_THREAD:
+        payload["options"]["num_thread"] = NUM_THREAD
+    try:
+        response = session.post(OLLAMA_URL, data=orjson.dumps(payload), timeout=timeout)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        return data["response"], data.get("done_reason")
+    except Exception as e:
+        print(f"    API Error: {e}")
+        return None, None
+
+# Robust Regex Pattern (compiled once). Each group starts and ends on a
+# non-space character, so captures come out already trimmed
+EMAIL_PATTERN = re.compile(
+    r'SUBJECT:\s*(\S(?:.*?\S)?)\s+BODY:\s*(\S(?:.*?\S)?)\s+TONE:\s*(\S(?:.*?\S)?)\s+INTENT:\s*(\S(?:.*?\S)?)\s*\Z',
+    re.DOTALL | re.IGNORECASE
+)
+
+def parse_email(text):
+    match = EMAIL_PATTERN.search(text)
+
+    if match:
+        return {
+            "subject": match.group(1),
+            "body": match.group(2),
+            "tone": match.group(3),
+            "intent": match.group(4)
+        }
+    return None
+
+def hash_body(body):
+    """64-bit BLAKE2b fingerprint of an email body, used only for duplicate detection."""
+    return int.from_bytes(hashlib.blake2b(body.encode('utf-8'), digest_size=8).digest(), "little")
+
+def shingle_positions(body):
+    """Yields the Bloom filter bit positions of each word 5-gram in body."""
+    words = body.lower().split()
+    for i in range(len(words) - 4):
+        h = hash_body(" ".join(words[i:i + 5]))
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        yield [(h1 + k * h2) % BLOOM_BITS for k in range(BLOOM_HASHES)]
+
+def bloom_add(bloom, body):
+    """Records every word 5-gram of an accepted body in the filter."""
+    for positions in shingle_positions(body):
+        for pos in positions:
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+def bloom_contains(bloom, positions):
+    """True if every bit position of one 5-gram is set in the filter."""
+    return all(bloom[pos >> 3] & (1 << (pos & 7)) for pos in positions)
+
+def bloom_overlap(bloom, body, skip=None):
+    """
+    Fraction of body's word 5-grams that are (probably) already in the filter.
+    5-grams also found in skip (the prompt's example email) are left out of the count.
+    """
+    hits = total = 0
+    for positions in shingle_positions(body):
+        if skip is not None and bloom_contains(skip, positions):
+            continue
+        total += 1
+        if bloom_contains(bloom, positions):
+            hits += 1
+    return hits / total if total else 0.0
+
+def trim_partial_row(path):
+    """
+    Cuts a half-written last row (process killed mid-write) off the end of a CSV so the
+    next append starts on a fresh line instead of inside an open quoted field.
+    Returns the number of bytes removed.
+    """
+    with open(path, "r+b") as f:
+        pos = 0
+        ends_with_newline = True
+
+        def lines():
+            nonlocal pos, ends_with_newline
+            for raw in f:
+                pos += len(raw)
+                ends_with_newline = raw.endswith(b"\n")
+                yield raw.decode("utf-8", "replace")
+
+        width = row_start = row_end = 0
+        last_row = None
+        for row in csv.reader(lines()):
+            width = width or len(row)
+            row_start, row_end = row_end, pos
+            last_row = row
+
+        if last_row is None or (ends_with_newline and len(last_row) >= width):
+            return 0
+        f.truncate(row_start)
+        return pos - row_start
+
+# =========================
+# CAMPAIGN
+# =========================
+def generate_campaign(prompt_prefix, prompt_suffix_tpl, output_csv, n, roles=ROLES, adjectives=ADJECTIVES,
+                      *, system_prompt, debug_dir, log_path):
+    """
+    Generates emails until output_csv holds n rows, resuming where the last run stopped.
+    Each request's prompt is prompt_prefix + prompt_suffix_tpl.format(role=..., adjective=...).
+    Returns the number of new unique emails saved.
+    """
+    os.makedirs(debug_dir, exist_ok=True)
+
+    # Initialize CSV with headers if it doesn't exist (or was left empty)
+    new_csv = not os.path.exists(output_csv) or os.path.getsize(output_csv) == 0
+    if new_csv:
+        with open(output_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["id", "subject", "body", "tone", "intent"])
+            writer.writeheader()
+
+    # Bloom filter over word 5-grams of accepted bodies, for near-duplicate rejection
+    bloom = bytearray(BLOOM_BITS // 8)
+    # Every reply copies phrases from the example in the static prompt; those 5-grams say
+    # nothing about whether two replies are near-duplicates of each other, so they are skipped
+    example_bloom = bytearray(BLOOM_BITS // 8)
+    bloom_add(example_bloom, prompt_prefix)
+
+    # Load existing hashes to avoid duplicates. One 8-byte hash per CSV row lives in
+    # hashes_path and the filter is saved to bloom_path at the end; if the CSV changed
+    # after that (crash, manual edit) we fall back to scanning it.
+    hashes_path = output_csv + ".hashes"
+    bloom_path = output_csv + ".bloom"
+    row_hashes = array("Q")
+    rescanned = True
+
+    if (not new_csv and os.path.exists(hashes_path) and os.path.exists(bloom_path)
+            and os.path.getmtime(bloom_path) >= os.path.getmtime(output_csv)
+            and os.path.getsize(bloom_path) == len(bloom)):
+        with open(hashes_path, "rb") as f:
+            row_hashes.frombytes(f.read())
+        with open(bloom_path, "rb") as f:
+            bloom[:] = f.read()
+        rescanned = False
+    else:
+        removed = trim_partial_row(output_csv)
+        if removed:
+            print(f"Dropped a half-written last row ({removed} bytes) from {output_csv}")
+        # Stream rows by column index; no per-row dict and no full list in memory
+        with open(output_csv, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            # No header or no body column: nothing to dedupe against, treat it as empty
+            if header and "body" in header:
+                body_idx = header.index("body")
+                for row in reader:
+                    body = row[body_idx] if len(row) > body_idx else ""
+                    row_hashes.append(hash_body(body))
+                    if body:
+                        bloom_add(bloom, body)
+        with open(hashes_path, "wb") as f:
+            row_hashes.tofile(f)
+
+    seen_hashes = set(row_hashes)
+    start_id = len(row_hashes) + 1
+
+    print(f"RESUMING from ID {start_id} (Loaded {len(seen_hashes)} existing unique emails)")
+
+    # Keep one appending handle each for the CSV, hashes and log instead of reopening per row
+    csv_file = open(output_csv, "a", newline="", encoding="utf-8", buffering=1 << 16)
+    csv_writer = csv.DictWriter(csv_file, fieldnames=["id", "subject", "body", "tone", "intent"])
+    hash_file = open(hashes_path, "ab")
+    log_file = open(log_path, "a", encoding="utf-8")
+
+    # Shared between worker threads: hash set, CSV/log appends and the next free ID.
+    # Reentrant so log_event can take it whether or not the caller already holds it
+    lock = threading.RLock()
+    stop_event = threading.Event()
+    next_id = start_id
+
+    # Unique emails per (role, adjective) bucket and average body length per role, kept across runs.
+    # Like the hashes and filter, it is only trusted when the CSV is unchanged since the last
+    # run; a new or rescanned CSV starts from empty stats
+    bucket_stats = shelve.open(output_csv + ".buckets", flag="n" if rescanned else "c")
+
+    # Walk a shuffled Cartesian product so every (role, adjective) pair is used before any repeats
+    bucket_order = list(itertools.product(roles, adjectives))
+    random.shuffle(bucket_order)
+    bucket_cycle = itertools.cycle(bucket_order)
+
+    def log_event(message):
+        """Logs success/fail events to a text file with timestamp."""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with lock:
+                log_file.write(f"[{timestamp}] {message}\n")
+        except Exception as e:
+            print(f"Logging error: {e}")
+
+    def pick_bucket(role, adj):
+        """
+        Returns (role, adj) if its bucket has room, otherwise the next pair in the cycle that does.
+        Returns None once a full pass over the cycle finds every bucket saturated.
+        """
+        if bucket_stats.get(f"{role}|{adj}", 0) < BUCKET_LIMIT:
+            return role, adj
+        for _ in range(len(bucket_order)):
+            role, adj = next(bucket_cycle)
+            if bucket_stats.get(f"{role}|{adj}", 0) < BUCKET_LIMIT:
+                return role, adj
+        return None
+
+    def num_predict_for(role):
+        """Picks the smallest reply cap that fits the average body length seen for this role."""
+        count, mean_chars = bucket_stats.get(f"len|{role}", (0, 0))
+        if count < 3:
+            return NUM_PREDICT_TIERS[-1]
+        # ~4 characters per token for the body, plus headroom and the SUBJECT/TONE/INTENT lines
+        needed = mean_chars / 4 * 1.25 + 80
+        for cap in NUM_PREDICT_TIERS:
+            if needed <= cap:
+                return cap
+        return NUM_PREDICT_TIERS[-1]
+
+    def record_length(role, chars):
+        """Folds one reply length into the running per-role mean. Call with the lock held."""
+        count, mean_chars = bucket_stats.get(f"len|{role}", (0, 0))
+        bucket_stats[f"len|{role}"] = (count + 1, mean_chars + (chars - mean_chars) / (count + 1))
+
+    def generate_email(slot, role, adj):
+        """Runs up to MAX_RETRIES attempts for one slot and saves the first unique email."""
+        nonlocal next_id
+        min_predict = 0  # Raised to the next tier after a truncated reply
+
+        # Optional Manual Stop Check
+        if stop_event.is_set() or os.path.exists("stop.txt"):
+            stop_event.set()
+            return False
+
+        for attempt in range(1, MAX_RETRIES + 1):
+            if stop_event.is_set():
+                return False
+
+            # Skip saturated buckets instead of paying for a likely duplicate
+            with lock:
+                bucket = pick_bucket(role, adj)
+                if bucket is None:
+                    log_event(f"SKIPPED: Slot {slot}, every (role, adjective) bucket is saturated.")
+                    print(f"Slot {slot}: ❌ All buckets saturated (skipping)", flush=True)
+                    return False
+                role, adj = bucket
+                num_predict = max(num_predict_for(role), min_predict)
+            current_prompt = prompt_prefix + prompt_suffix_tpl.format(role=role, adjective=adj)
+
+            raw_output, done_reason = call_ollama(current_prompt, system_prompt, num_predict)
+
+            if not raw_output:
+                continue
+
+            if done_reason == "length":
+                # Hit the token cap: the INTENT line is missing or cut short, so retry one tier up.
+                # The cut-off reply is a lower bound on this role's length; recording it lets
+                # the per-role mean climb instead of only ever learning from replies that fit
+                with lock:
+                    record_length(role, len(raw_output))
+                min_predict = next((cap for cap in NUM_PREDICT_TIERS if cap > num_predict), NUM_PREDICT_TIERS[-1])
+                print(f"Slot {slot}: ⚠ Truncated at {num_predict} tokens", flush=True)
+                continue
+
+            email_data = parse_email(raw_output)
+
+            if email_data:
+                # Check duplicates
+                body_hash = hash_body(email_data["body"])
+
+                with lock:
+                    if body_hash in seen_hashes:
+                        print(f"Slot {slot}: [Duplicate detected]", flush=True)
+                        # Bucket is repeating itself; move on to a different pair
+                        bucket_stats[f"{role}|{adj}"] = BUCKET_LIMIT
+                        continue
+
+                    if bloom_overlap(bloom, email_data["body"], example_bloom) >= NEAR_DUP_OVERLAP:
+                        print(f"Slot {slot}: [Near-duplicate detected]", flush=True)
+                        # Retry with the next pair, but don't mark this bucket saturated for good
+                        role, adj = next(bucket_cycle)
+                        continue
+
+                    # SUCCESS
+                    email_data["id"] = next_id
+                    next_id += 1
+                    seen_hashes.add(body_hash)
+                    bloom_add(bloom, email_data["body"])
+                    bucket_stats[f"{role}|{adj}"] = bucket_stats.get(f"{role}|{adj}", 0) + 1
+                    record_length(role, len(email_data["body"]))
+
+                    # Save to CSV
+                    csv_writer.writerow(email_data)
+                    hash_file.write(body_hash.to_bytes(8, sys.byteorder))
+
+                    # Log Success
+                    log_event(f"SUCCESS: Email ID {email_data['id']} saved. (Role: {role})")
+
+                    if email_data["id"] % FLUSH_EVERY == 0:
+                        csv_file.flush()
+                        hash_file.flush()
+                        log_file.flush()
+
+                print(f"Generated ID {email_data['id']}/{n}... ✅ Saved", flush=True)
+                return True
+            else:
+                # Save debug file on failure
+                with open(os.path.join(debug_dir, f"fail_{slot}_att{attempt}.txt"), "w", encoding="utf-8") as f:
+                    f.write(raw_output)
+                print(f"Slot {slot}: ⚠ Parse Fail", flush=True)
+
+        # Log Failure
+        log_event(f"SKIPPED: Slot {slot} failed after {MAX_RETRIES} attempts. (Role: {role})")
+        print(f"Slot {slot}: ❌ Failed {MAX_RETRIES} attempts (skipping)", flush=True)
+        return False
+
+    total_success = 0
+
+    print(f"Starting generation of {n} emails ({PARALLEL} in flight)...")
+    print(f"Saving data to: {output_csv}")
+    print(f"Saving logs to: {log_path}")
+    print("-" * 50)
+
+    try:
+        log_event(f"--- STARTING SCRIPT SESSION FROM ID {start_id} ---")
+
+        # Take one (role, adjective) pair per remaining slot from the shuffled cycle
+        plan = list(itertools.islice(bucket_cycle, max(0, n - start_id + 1)))
+        # Submit same-length roles together so the requests in flight finish at similar times
+        plan.sort(key=lambda pair: num_predict_for(pair[0]))
+
+        with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+            futures = [pool.submit(generate_email, slot, role, adj) for slot, (role, adj) in enumerate(plan, start_id)]
+            try:
+                for future in as_completed(futures):
+                    if future.result():
+                        total_success += 1
+            except KeyboardInterrupt:
+                # Drop the queued slots; the ones in flight see stop_event and finish their current call
+                stop_event.set()
+                pool.shutdown(cancel_futures=True)
+                print(f"\n🛑 Interrupted. Waiting for in-flight requests... ({total_success} new emails so far)")
+                log_event(f"MANUAL STOP: KeyboardInterrupt. TOTAL NEW EMAILS: {total_success}")
+                raise
+
+        if stop_event.is_set():
+            print("\n🛑 Stop file detected. Closed safely.")
+            log_event("MANUAL STOP: stop.txt detected.")
+
+        print("=" * 50)
+        print(f"Job Complete/Stopped. Generated {total_success} new unique emails.")
+        log_event(f"--- SCRIPT STOPPED. TOTAL NEW EMAILS: {total_success} ---")
+    finally:
+        # Close the CSV before writing the filter so the bloom file ends up newer than it
+        bucket_stats.close()
+        csv_file.close()
+        hash_file.close()
+        log_file.close()
+        with open(bloom_path, "wb") as f:
+            f.write(bloom)
+
+    return total_success
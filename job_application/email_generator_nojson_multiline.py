@@ -1,19 +1,20 @@
-import requests
-import json
+import orjson
 import os
-import time
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# generator.py lives one level up, next to run_all.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generator import MAX_RETRIES, PARALLEL, call_ollama, parse_email as parse_email_robust
 
 # =========================
 # CONFIGURATION
 # =========================
-MODEL_NAME = "llama3.2:3b-instruct-q4_0"
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OUTPUT_DIR = "emails"
-DEBUG_DIR = "emails/debug"  # Separate debug folder
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(HERE, "emails")
+DEBUG_DIR = os.path.join(OUTPUT_DIR, "debug")  # Separate debug folder
 NUM_EMAILS = 20
-DELAY_SECONDS = 0.3
-MAX_RETRIES = 3
 
 # =========================
 # PROMPTS
@@ -67,119 +68,34 @@ OUTPUT ONLY THE FOUR FIELDS.
 """
 
 
-# =========================
-# SETUP OUTPUT DIRECTORIES
-# =========================
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(DEBUG_DIR, exist_ok=True)
-
 # =========================
 # HELPER FUNCTIONS
 # =========================
-def call_ollama(prompt, system):
-    payload = {
-        "model": MODEL_NAME,
-        "system": system,
-        "prompt": prompt,
-        "stream": False
-    }
-    response = requests.post(OLLAMA_URL, json=payload, timeout=120)
-    response.raise_for_status()
-    return response.json()["response"]
-
-def parse_email_robust(text):
-    """
-    FIXED: Robust parser using regex to handle multi-line content.
-    Now more forgiving with whitespace and newlines.
-    """
-    text = text.strip()
-    
-    # Pattern: Match fields with flexible whitespace/newlines between them
-    # Use non-greedy matching and allow multiple newlines
-    pattern = r'SUBJECT:\s*(.+?)\s+BODY:\s*(.+?)\s+TONE:\s*(.+?)\s+INTENT:\s*(.+?)(?:\s*)$'
-    
-    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-    
-    if match:
-        subject = match.group(1).strip()
-        body = match.group(2).strip()
-        tone = match.group(3).strip()
-        intent = match.group(4).strip()
-        
-        # Validate all fields have content
-        if subject and body and tone and intent:
-            return {
-                "subject": subject,
-                "body": body,
-                "tone": tone,
-                "intent": intent
-            }
-    
-    return None
+# Field labels wherever they start a line, in any order
+LABEL_PATTERN = re.compile(r'^(SUBJECT|BODY|TONE|INTENT):', re.MULTILINE | re.IGNORECASE)
 
 def parse_email_fallback(text):
     """
-    Fallback parser for cases where regex fails.
-    More permissive but still handles multi-line content.
+    Fallback parser for cases where regex fails, e.g. the model wrote the fields out of order.
+    Each field runs from its label to the next label; the first occurrence of a label wins.
     """
-    text = text.strip()
-    lines = text.split('\n')
+    labels = list(LABEL_PATTERN.finditer(text))
     
-    fields = {"subject": "", "body": "", "tone": "", "intent": ""}
-    current_field = None
-    buffer = []
-    
-    for line in lines:
-        # Check if this line starts a new field (case-insensitive, start of line)
-        line_upper = line.strip().upper()
-        
-        if line_upper.startswith("SUBJECT:"):
-            if current_field and buffer:
-                fields[current_field] = "\n".join(buffer).strip()
-            current_field = "subject"
-            # Capture content on same line if present
-            content = line.split(":", 1)[1].strip() if ":" in line else ""
-            buffer = [content] if content else []
-            
-        elif line_upper.startswith("BODY:"):
-            if current_field and buffer:
-                fields[current_field] = "\n".join(buffer).strip()
-            current_field = "body"
-            content = line.split(":", 1)[1].strip() if ":" in line else ""
-            buffer = [content] if content else []
-            
-        elif line_upper.startswith("TONE:"):
-            if current_field and buffer:
-                fields[current_field] = "\n".join(buffer).strip()
-            current_field = "tone"
-            content = line.split(":", 1)[1].strip() if ":" in line else ""
-            buffer = [content] if content else []
-            
-        elif line_upper.startswith("INTENT:"):
-            if current_field and buffer:
-                fields[current_field] = "\n".join(buffer).strip()
-            current_field = "intent"
-            content = line.split(":", 1)[1].strip() if ":" in line else ""
-            buffer = [content] if content else []
-            
-        else:
-            # Continue accumulating content for current field
-            if current_field:
-                buffer.append(line)
-    
-    # Don't forget the last field
-    if current_field and buffer:
-        fields[current_field] = "\n".join(buffer).strip()
+    fields = {}
+    for label, next_label in zip(labels, labels[1:] + [None]):
+        name = label.group(1).lower()
+        if name not in fields:
+            fields[name] = text[label.end():next_label.start() if next_label else len(text)].strip()
     
     # Validate completeness
-    if all(fields.values()):
-        return fields
+    if len(fields) == 4 and all(fields.values()):
+        return {name: fields[name] for name in ("subject", "body", "tone", "intent")}
     
     return None
 
 def parse_email(text):
     """
-    Try robust regex parser first, fall back to line-by-line parser.
+    Try robust regex parser first, fall back to the order-independent label scan.
     """
     result = parse_email_robust(text)
     if result:
@@ -187,26 +103,22 @@ def parse_email(text):
     
     return parse_email_fallback(text)
 
-# =========================
-# GENERATION LOOP
-# =========================
-successful = 0
-failed = 0
-
-for i in range(1, NUM_EMAILS + 1):
+def generate_email(i):
+    """Runs up to MAX_RETRIES attempts for email i and saves it as JSON."""
     print(f"\nGenerating email {i}/{NUM_EMAILS}")
-    success = False
     
     for attempt in range(1, MAX_RETRIES + 1):
-        print(f"  Attempt {attempt}")
+        print(f"  Email {i} attempt {attempt}")
         try:
-            raw_output = call_ollama(USER_PROMPT, SYSTEM_PROMPT)
+            raw_output, done_reason = call_ollama(USER_PROMPT, SYSTEM_PROMPT, timeout=120 * PARALLEL)
+            
+            if not raw_output:
+                continue
             
-            # Save raw output to DEBUG folder
-            debug_file = os.path.join(DEBUG_DIR, f"debug_email_{i:04d}_attempt_{attempt}.txt")
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(raw_output)
-            print(f"    DEBUG: Saved raw output to {debug_file}")
+            if done_reason == "length":
+                # Reply hit the token cap, so the last field is cut short
+                print(f"  ⚠ Email {i}: reply truncated, retrying...")
+                continue
             
             email_data = parse_email(raw_output)
             
@@ -215,41 +127,59 @@ for i in range(1, NUM_EMAILS + 1):
                 filename = f"email_{i:04d}.json"
                 filepath = os.path.join(OUTPUT_DIR, filename)
                 
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(email_data, f, indent=2, ensure_ascii=False)
+                with open(filepath, "wb") as f:
+                    f.write(orjson.dumps(email_data, option=orjson.OPT_INDENT_2))
                 
                 print(f"  ✅ Saved {filepath}")
-                successful += 1
-                success = True
-                
-                # Clean up debug files on success
-                for att in range(1, attempt + 1):
-                    try:
-                        os.remove(os.path.join(DEBUG_DIR, f"debug_email_{i:04d}_attempt_{att}.txt"))
-                    except:
-                        pass
-                break
+                return True
             else:
-                print("  ⚠ Format invalid, retrying...")
+                # Save raw output to DEBUG folder only when it could not be parsed
+                debug_file = os.path.join(DEBUG_DIR, f"debug_email_{i:04d}_attempt_{attempt}.txt")
+                with open(debug_file, "w", encoding="utf-8") as f:
+                    f.write(raw_output)
+                print(f"  ⚠ Email {i}: format invalid, retrying...")
+                print(f"    DEBUG: Saved raw output to {debug_file}")
                 # Print first 200 chars of output for quick debugging
                 print(f"    First 200 chars: {raw_output[:200]}")
                 
         except Exception as e:
-            print(f"  ❌ Error: {e}")
-        
-        time.sleep(0.2)
+            print(f"  ❌ Email {i} error: {e}")
     
-    if not success:
-        print(f"  ❌ Skipped email {i} after {MAX_RETRIES} attempts")
-        print(f"  📋 Check debug files in '{DEBUG_DIR}' folder for raw outputs")
-        failed += 1
+    print(f"  ❌ Skipped email {i} after {MAX_RETRIES} attempts")
+    print(f"  📋 Check debug files in '{DEBUG_DIR}' folder for raw outputs")
+    return False
+
+# =========================
+# GENERATION LOOP
+# =========================
+def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(DEBUG_DIR, exist_ok=True)
     
-    time.sleep(DELAY_SECONDS)
-
-print(f"\n{'='*50}")
-print(f"✅ Bulk email generation complete.")
-print(f"   Successful: {successful}/{NUM_EMAILS}")
-print(f"   Failed: {failed}/{NUM_EMAILS}")
-if failed > 0:
-    print(f"   📋 Debug files saved in '{DEBUG_DIR}' folder - check them to see what the model is actually generating")
-print(f"{'='*50}")
\ No newline at end of file
+    successful = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+        futures = [pool.submit(generate_email, i) for i in range(1, NUM_EMAILS + 1)]
+        try:
+            for future in as_completed(futures):
+                if future.result():
+                    successful += 1
+                else:
+                    failed += 1
+        except KeyboardInterrupt:
+            # Drop the queued emails instead of running the rest of them on the way out
+            pool.shutdown(cancel_futures=True)
+            print(f"\n🛑 Interrupted. Waiting for in-flight requests... ({successful} saved so far)")
+            raise
+
+    print(f"\n{'='*50}")
+    print(f"✅ Bulk email generation complete.")
+    print(f"   Successful: {successful}/{NUM_EMAILS}")
+    print(f"   Failed: {failed}/{NUM_EMAILS}")
+    if failed > 0:
+        print(f"   📋 Debug files saved in '{DEBUG_DIR}' folder - check them to see what the model is actually generating")
+    print(f"{'='*50}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+
+from job_application import job_application_mails, email_generator_nojson_multiline
+from onboarding import onboarding
+
+# =========================
+# CAMPAIGNS
+# =========================
+# Run back-to-back in one interpreter so the model stays loaded in Ollama
+# and every campaign shares generator.py's keep-alive session
+CAMPAIGNS = [
+    ("job_application", job_application_mails.main),
+    ("onboarding", onboarding.main),
+    ("interview_invitation_json", email_generator_nojson_multiline.main),
+]
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    for name, run in CAMPAIGNS:
+        if os.path.exists("stop.txt"):
+            print("\n🛑 Stop file detected. Skipping remaining campaigns.")
+            break
+        print(f"\n{'#' * 50}\n# CAMPAIGN: {name}\n{'#' * 50}")
+        run()